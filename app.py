@@ -1,117 +1,183 @@
 
 import streamlit as st
 import pandas as pd
-import pdfplumber
-from bs4 import BeautifulSoup
+from selectolax.parser import HTMLParser
 import re
 import io
+import sys
+
+from pdf_extraction import extract_page_texts
+
+# ==============================================================================
+# MOTIFS REGEX (compilés une seule fois au chargement du module)
+# ==============================================================================
+
+# En-tête de section/plan. Exemple de ligne : "Section : AC  Plan : 124"
+HEADER_PAT = r"(?P<header>Section\s*:\s*(?P<sec>\w+)\s*Plan\s*:\s*(?P<pln>\d+))"
+# Numéro de lot, ex: "Lot 12". (?!\d) empêche le retour arrière dans le
+# numéro : "Lot 123/10000" donne bien le lot 123.
+LOT_PAT = r"(?P<lot>Lot\s+(?P<lotnum>\d+)(?!\d))"
+
+# Les deux motifs sont fusionnés en une seule regex, appliquée une fois par
+# ligne avec match() ; le type de ligne est donné par match.lastgroup.
+# Chaque alternative est précédée de .*? pour chercher dans toute la ligne,
+# et l'en-tête est essayé en premier : il reste prioritaire sur un lot
+# présent plus tôt dans la même ligne.
+LINE_RE = re.compile(rf".*?{HEADER_PAT}|.*?{LOT_PAT}", re.IGNORECASE)
+# Tantièmes sous forme de fraction, ex: "123 / 10000". Recherchés à part,
+# n'importe où dans la ligne (avant ou après le numéro de lot).
+TANT_RE = re.compile(r"(\d+\s*/\s*\d+)")
+
+DIGIT_RE = re.compile(r"\d")
+ALPHA_RE = re.compile(r"[a-zA-Z]")
+
+# Ligne de nom de propriétaire (majuscules uniquement). Le moteur regex
+# s'arrête au premier caractère non autorisé, ce qui écarte très vite les
+# lignes d'adresse ou de texte courant.
+NAME_RE = re.compile(r"^[A-Z\s/.'-]{5,}$")
+
+# Motifs utilisés par le parseur HTML
+HTML_HEADER_RE = re.compile(r"Section\s*(\w+)\s*Plan\s*(\d+)", re.IGNORECASE)
+HTML_LOT_RE = re.compile(r"Lot\s*(\d+)")
+HTML_SECTION_RE = re.compile(r'Section', re.IGNORECASE)
 
 # ==============================================================================
 # FONCTIONS DE PARSING (MOTEUR BACKEND)
 # ==============================================================================
 
-def parse_pdf(file_stream, sections_filtre, plans_filtre):
+def parse_pdf(page_texts, parcelles_filtre):
     """
-    Analyse un fichier PDF pour extraire les données cadastrales.
+    Analyse le texte d'un fichier PDF pour extraire les données cadastrales.
     La logique est basée sur la lecture séquentielle du texte et la détection
     de mots-clés et de motifs (Regex) pour identifier les propriétaires,
     adresses et lots.
 
+    Cette boucle reste en Python pur : l'extraction du texte par PDFium
+    domine le temps d'analyse, et les lignes sans intérêt sont écartées par
+    des tests de caractères avant tout appel au moteur regex.
+
     Args:
-        file_stream: Le flux binaire du fichier PDF uploadé.
-        sections_filtre (list): Liste des sections à traiter.
-        plans_filtre (list): Liste des numéros de plan à traiter.
+        page_texts (list): Le texte de chaque page (voir extract_page_texts).
+        parcelles_filtre (frozenset): Ensemble des couples (section, plan)
+            à traiter.
 
     Returns:
         pd.DataFrame: Un DataFrame contenant les données extraites.
     """
-    data = []
-    
-    with pdfplumber.open(file_stream) as pdf:
-        current_section = None
-        current_plan = None
-        current_proprietaire = []
-        current_adresse = ""
-        is_in_relevant_parcel = False
-
-        for page in pdf.pages:
-            text = page.extract_text()
-            if not text:
+    # Données stockées par colonne (une liste par colonne) : le DataFrame est
+    # construit en une fois, sans inférence de schéma ligne par ligne.
+    cols = {
+        "Section": [],
+        "Plan": [],
+        "N° Lot": [],
+        "Tantièmes": [],
+        "Propriétaires": [],
+        "Adresse Postale Propriétaire": [],
+    }
+    current_section = None
+    current_plan = None
+    current_proprietaire = []
+    current_adresse_parts = []
+    is_in_relevant_parcel = False
+    # Méthode liée une seule fois : évite la recherche d'attribut à chaque ligne.
+    line_match = LINE_RE.match
+
+    for text in page_texts:
+        if not text:
+            continue
+
+        for line in text.splitlines():
+            line = line.strip()
+            # Les lignes vides ne correspondent à aucun motif ni à une adresse.
+            if not line:
                 continue
-            
-            lines = text.split('\n')
-            
-            for line in lines:
-                # Regex pour détecter l'en-tête de section/plan.
-                # Exemple de ligne : "Section : AC  Plan : 124"
-                header_match = re.search(r"Section\s*:\s*(\w+)\s*Plan\s*:\s*(\d+)", line, re.IGNORECASE)
-                if header_match:
-                    current_section = header_match.group(1).strip().upper()
-                    current_plan = header_match.group(2).strip()
-                    
-                    # Vérifie si la parcelle correspond aux filtres de l'utilisateur
-                    is_in_relevant_parcel = (current_section in sections_filtre and current_plan in plans_filtre)
-                    
-                    # Réinitialise les informations du propriétaire pour la nouvelle parcelle
-                    current_proprietaire = []
-                    current_adresse = ""
+
+            # Pré-filtre par simples tests de caractères, bien moins coûteux
+            # qu'un appel au moteur regex sur les lignes sans intérêt :
+            # - un en-tête contient forcément ":",
+            # - hors parcelle recherchée, seuls les en-têtes comptent,
+            # - sinon la ligne doit pouvoir être un lot ("/" des tantièmes),
+            #   un nom (commence par une majuscule) ou l'adresse attendue.
+            if ":" not in line:
+                if not is_in_relevant_parcel:
+                    continue
+                awaiting_address = current_proprietaire and not current_adresse_parts
+                if not ("/" in line or line[0].isupper() or line[0] in ".'-" or awaiting_address):
                     continue
 
-                if is_in_relevant_parcel:
-                    # Regex pour les lots et tantièmes.
-                    # Cherche une ligne contenant "Lot" et une fraction (ex: 123 / 10000)
-                    lot_match = re.search(r"Lot\s+(\d+)", line, re.IGNORECASE)
-                    tantiemes_match = re.search(r"(\d+\s*/\s*\d+)", line)
-                    
-                    if lot_match and tantiemes_match:
-                        lot_num = lot_match.group(1)
-                        tantiemes = tantiemes_match.group(1).replace(" ", "")
-                        
-                        # Si un lot est trouvé, on l'associe au dernier propriétaire identifié
-                        if current_proprietaire:
-                            data.append({
-                                "Section": current_section,
-                                "Plan": current_plan,
-                                "N° Lot": lot_num,
-                                "Tantièmes": tantiemes,
-                                "Propriétaires": "\n".join(current_proprietaire),
-                                "Adresse Postale Propriétaire": current_adresse.strip()
-                            })
-                    # Heuristique pour identifier un nom de propriétaire :
-                    # - Ligne en majuscules
-                    # - Contient au moins une lettre
-                    # - Ne ressemble pas à une ligne de lot/tantième
-                    elif re.match(r"^[A-Z\s/.'-]{5,}$", line.strip()) and not lot_match and not tantiemes_match and "LOT" not in line.upper():
-                        # Si on trouve un nouveau nom, c'est un nouveau bloc propriétaire.
-                        # On réinitialise l'adresse.
-                        if current_adresse:
-                            current_proprietaire = []
-                            current_adresse = ""
-                        current_proprietaire.append(line.strip())
-                    
-                    # Heuristique pour l'adresse :
-                    # - Suit immédiatement un nom de propriétaire
-                    # - Contient souvent un code postal (5 chiffres) ou un nom de rue.
-                    elif current_proprietaire and not current_adresse:
-                        # On suppose que les lignes suivant le nom sont l'adresse,
-                        # jusqu'à ce qu'on trouve une ligne vide ou un nouveau motif (lot/propriétaire).
-                        # Une ligne d'adresse est souvent alphanumérique.
-                        if re.search(r"\d", line) and re.search(r"[a-zA-Z]", line):
-                             current_adresse += line.strip() + "\n"
+            match = line_match(line)
+            kind = match.lastgroup if match else None
 
-    return pd.DataFrame(data)
+            # En-tête de section/plan : début d'une nouvelle parcelle.
+            if kind == "header":
+                # Les groupes \w+ et \d+ ne contiennent pas d'espaces : pas de
+                # strip(). Les chaînes internées rendent la comparaison avec
+                # les filtres (eux aussi internés) quasi immédiate.
+                current_section = sys.intern(match.group("sec").upper())
+                current_plan = sys.intern(match.group("pln"))
+                
+                # Vérifie si la parcelle correspond aux filtres de l'utilisateur
+                is_in_relevant_parcel = (current_section, current_plan) in parcelles_filtre
+                
+                # Réinitialise les informations du propriétaire pour la nouvelle parcelle
+                current_proprietaire = []
+                current_adresse_parts = []
+                continue
 
+            if not is_in_relevant_parcel:
+                continue
 
-def parse_html(file_stream, sections_filtre, plans_filtre):
+            # Ligne contenant "Lot" et une fraction (ex: 123 / 10000)
+            tantiemes_match = TANT_RE.search(line) if kind == "lot" else None
+            if tantiemes_match:
+                lot_num = match.group("lotnum")
+                tantiemes = tantiemes_match.group(1).replace(" ", "")
+                
+                # Si un lot est trouvé, on l'associe au dernier propriétaire identifié
+                if current_proprietaire:
+                    cols["Section"].append(current_section)
+                    cols["Plan"].append(current_plan)
+                    cols["N° Lot"].append(lot_num)
+                    cols["Tantièmes"].append(tantiemes)
+                    cols["Propriétaires"].append("\n".join(current_proprietaire))
+                    cols["Adresse Postale Propriétaire"].append("\n".join(current_adresse_parts))
+            # Heuristique pour identifier un nom de propriétaire :
+            # - Ligne en majuscules
+            # - Contient au moins une lettre
+            # - Ne ressemble pas à une ligne de lot/tantième
+            elif NAME_RE.match(line):
+                if "LOT" in line:
+                    continue
+                # Si on trouve un nouveau nom, c'est un nouveau bloc propriétaire.
+                # On réinitialise l'adresse.
+                if current_adresse_parts:
+                    current_proprietaire = []
+                    current_adresse_parts = []
+                current_proprietaire.append(line)
+            
+            # Heuristique pour l'adresse :
+            # - Suit immédiatement un nom de propriétaire
+            # - Contient souvent un code postal (5 chiffres) ou un nom de rue.
+            elif current_proprietaire and not current_adresse_parts:
+                # On suppose que les lignes suivant le nom sont l'adresse,
+                # jusqu'à ce qu'on trouve une ligne vide ou un nouveau motif (lot/propriétaire).
+                # Une ligne d'adresse est souvent alphanumérique.
+                if DIGIT_RE.search(line) and ALPHA_RE.search(line):
+                    current_adresse_parts.append(line)
+
+    return pd.DataFrame(cols, copy=False)
+
+
+def parse_html(file_bytes, parcelles_filtre):
     """
     Analyse un fichier HTML. Cette fonction est un squelette et doit être
     adaptée à la structure EXACTE de votre fichier HTML. Les commentaires
     ci-dessous expliquent comment procéder.
 
     Args:
-        file_stream: Le flux du fichier HTML uploadé.
-        sections_filtre (list): Liste des sections à traiter.
-        plans_filtre (list): Liste des numéros de plan à traiter.
+        file_bytes (bytes): Le contenu binaire du fichier HTML uploadé.
+        parcelles_filtre (frozenset): Ensemble des couples (section, plan)
+            à traiter.
 
     Returns:
         pd.DataFrame: Un DataFrame contenant les données extraites.
@@ -133,58 +199,110 @@ def parse_html(file_stream, sections_filtre, plans_filtre):
     #   </table>
     # </div>
 
-    data = []
-    soup = BeautifulSoup(file_stream, 'html.parser')
+    # Données stockées par colonne (une liste par colonne) : le DataFrame est
+    # construit en une fois, sans inférence de schéma ligne par ligne.
+    cols = {
+        "Section": [],
+        "Plan": [],
+        "N° Lot": [],
+        "Tantièmes": [],
+        "Propriétaires": [],
+        "Adresse Postale Propriétaire": [],
+    }
+    # selectolax (parseur HTML5 en C) remplace BeautifulSoup et html.parser.
+    tree = HTMLParser(file_bytes)
 
     # Remplacez 'div.parcelle' par le sélecteur CSS qui englobe une parcelle complète.
-    parcelles = soup.select('div.parcelle')
+    parcelles = tree.css('div.parcelle')
     if not parcelles:
         # Si le sélecteur ci-dessus ne marche pas, on peut essayer une recherche plus générique.
         # Ici, on cherche tous les `<b>` qui pourraient contenir les infos de parcelle.
-        parcelles_headers = soup.find_all('b', string=re.compile(r'Section', re.IGNORECASE))
+        parcelles_headers = [b for b in tree.css('b') if HTML_SECTION_RE.search(b.text())]
         # Cette partie est à développer en fonction de la structure réelle du fichier.
         # Pour cet exemple, nous retournons un DataFrame vide pour le HTML.
         st.warning("Le parsing HTML n'est pas encore implémenté pour ce format de fichier. Veuillez adapter le code dans `app.py`.")
         return pd.DataFrame()
 
     for parcelle in parcelles:
-        header = parcelle.select_one('h2').text # Adaptez ce sélecteur
-        header_match = re.search(r"Section\s*(\w+)\s*Plan\s*(\d+)", header, re.IGNORECASE)
+        header = parcelle.css_first('h2').text() # Adaptez ce sélecteur
+        header_match = HTML_HEADER_RE.search(header)
         
         if header_match:
             section, plan = header_match.group(1).upper(), header_match.group(2)
-            if section in sections_filtre and plan in plans_filtre:
+            if (section, plan) in parcelles_filtre:
                 # Adaptez les sélecteurs suivants pour extraire les données.
-                nom = parcelle.select_one('.nom').text
-                adresse = parcelle.select_one('.adresse').text
+                nom = parcelle.css_first('.nom').text()
+                adresse = parcelle.css_first('.adresse').text()
                 
-                lignes_lots = parcelle.select('tr') # Supposons que les lots sont dans un tableau
+                lignes_lots = parcelle.css('tr') # Supposons que les lots sont dans un tableau
                 for ligne in lignes_lots:
-                    colonnes = ligne.select('td')
+                    colonnes = ligne.css('td')
                     if len(colonnes) == 2:
-                        lot_text = colonnes[0].text
-                        tantiemes = colonnes[1].text
-                        lot_num = re.search(r"Lot\s*(\d+)", lot_text).group(1)
+                        lot_text = colonnes[0].text()
+                        tantiemes = colonnes[1].text()
+                        lot_num = HTML_LOT_RE.search(lot_text).group(1)
                         
-                        data.append({
-                            "Section": section,
-                            "Plan": plan,
-                            "N° Lot": lot_num,
-                            "Tantièmes": tantiemes.strip(),
-                            "Propriétaires": nom,
-                            "Adresse Postale Propriétaire": adresse
-                        })
+                        cols["Section"].append(section)
+                        cols["Plan"].append(plan)
+                        cols["N° Lot"].append(lot_num)
+                        cols["Tantièmes"].append(tantiemes.strip())
+                        cols["Propriétaires"].append(nom)
+                        cols["Adresse Postale Propriétaire"].append(adresse)
                         
-    return pd.DataFrame(data)
+    return pd.DataFrame(cols, copy=False)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def extract_page_texts_cached(file_bytes):
+    """
+    Version mise en cache de extract_page_texts.
+
+    Le cache porte sur l'extraction du texte, de loin l'étape la plus
+    coûteuse, et ne dépend que du contenu du fichier : relancer l'analyse du
+    même fichier, même avec d'autres filtres, évite une nouvelle extraction.
+
+    Args:
+        file_bytes (bytes): Le contenu binaire du fichier PDF uploadé.
+
+    Returns:
+        list[str]: Le texte de chaque page, dans l'ordre du document.
+    """
+    return extract_page_texts(file_bytes)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def parse_html_cached(file_bytes, parcelles):
+    """
+    Version mise en cache de parse_html.
+
+    Streamlit indexe le cache sur le contenu du fichier et les filtres : une
+    nouvelle analyse du même fichier avec les mêmes filtres est immédiate.
+
+    Args:
+        file_bytes (bytes): Le contenu binaire du fichier HTML uploadé.
+        parcelles (tuple): Couples (section, plan) à traiter, triés.
+
+    Returns:
+        pd.DataFrame: Un DataFrame contenant les données extraites.
+    """
+    return parse_html(file_bytes, frozenset(parcelles))
 
 def to_excel(df):
-    """Convertit un DataFrame en un fichier Excel en mémoire."""
+    """Convertit un DataFrame en un fichier Excel en mémoire (moteur xlsxwriter)."""
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
         df.to_excel(writer, index=False, sheet_name='Extraction Cadastrale')
     processed_data = output.getvalue()
     return processed_data
 
+def to_csv(df):
+    """
+    Convertit un DataFrame en un fichier CSV en mémoire, bien plus rapide à
+    produire que le format Excel pour les extractions volumineuses.
+
+    Le séparateur ';' et l'encodage UTF-8 avec BOM permettent une ouverture
+    directe dans un Excel configuré en français.
+    """
+    return df.to_csv(index=False, sep=';').encode('utf-8-sig')
+
 # ==============================================================================
 # INTERFACE UTILISATEUR (STREAMLIT)
 # ==============================================================================
@@ -218,17 +336,24 @@ if start_analysis:
         st.error("Veuillez renseigner les sections et les numéros de plan dans la barre latérale.")
     else:
         # Nettoyage des inputs utilisateur
-        sections_filtre = [s.strip().upper() for s in sections_input.split(',')]
-        plans_filtre = [p.strip() for p in plans_input.split(',')]
+        sections_filtre = [sys.intern(s.strip().upper()) for s in sections_input.split(',')]
+        plans_filtre = [sys.intern(p.strip()) for p in plans_input.split(',')]
+        # Couples (section, plan) autorisés : une seule recherche par en-tête.
+        parcelles_filtre = frozenset((s, p) for s in sections_filtre for p in plans_filtre)
         
         with st.spinner("Analyse du document en cours..."):
             try:
                 file_extension = uploaded_file.name.split('.')[-1].lower()
+                # Le fichier est lu une seule fois : ces octets servent de clé au cache
+                # et sont passés tels quels aux parseurs.
+                file_bytes = uploaded_file.getvalue()
+                parcelles = tuple(sorted(parcelles_filtre))
                 
                 if file_extension == 'pdf':
-                    df_results = parse_pdf(uploaded_file, sections_filtre, plans_filtre)
+                    page_texts = extract_page_texts_cached(file_bytes)
+                    df_results = parse_pdf(page_texts, parcelles_filtre)
                 elif file_extension == 'html':
-                    df_results = parse_html(uploaded_file, sections_filtre, plans_filtre)
+                    df_results = parse_html_cached(file_bytes, parcelles)
                 else:
                     st.error("Format de fichier non supporté.")
                     df_results = pd.DataFrame()
@@ -245,6 +370,12 @@ if start_analysis:
                         file_name=f"extraction_cadastrale_{sections_input}_{plans_input}.xlsx",
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                     )
+                    st.download_button(
+                        label="📥 Télécharger le fichier CSV",
+                        data=to_csv(df_results),
+                        file_name=f"extraction_cadastrale_{sections_input}_{plans_input}.csv",
+                        mime="text/csv"
+                    )
                 else:
                     st.warning("Aucune donnée correspondante n'a été trouvée avec les filtres fournis. Vérifiez vos entrées ou le contenu du fichier.")
 
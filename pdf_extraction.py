@@ -0,0 +1,122 @@
+"""
+Extraction du texte des fichiers PDF avec PDFium (pypdfium2).
+
+Ces fonctions vivent dans un module séparé de app.py : Streamlit exécute
+app.py comme un script, et les fonctions qui y sont définies ne peuvent pas
+être transmises aux processus de travail du pool.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pypdfium2 as pdfium
+
+# Coûts mesurés (pypdfium2 4.28, pages de relevé denses) : environ 1,5 ms
+# d'extraction par page en série, et environ 1,1 s pour démarrer un pool
+# "spawn" (nouvel interpréteur, imports, copie du PDF dans chaque processus).
+SECONDES_PAR_PAGE = 0.0015
+SECONDES_DEMARRAGE_POOL = 1.1
+
+
+def _available_cpus():
+    """
+    Nombre de CPU réellement utilisables par le processus.
+
+    Dans un conteneur, os.cpu_count() renvoie les CPU de l'hôte ; l'affinité
+    du processus reflète les CPU qui lui sont attribués.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _parallel_is_worth_it(n_pages, n_workers):
+    """
+    Indique si l'extraction parallèle est plus rapide que l'extraction en
+    série, d'après les coûts mesurés ci-dessus : le temps gagné en répartissant
+    les pages doit dépasser le démarrage du pool. Avec 2 processus, il faut
+    ainsi près de 1500 pages ; avec 8, environ 840.
+    """
+    if n_workers < 2:
+        return False
+    gain = n_pages * SECONDES_PAR_PAGE * (1 - 1 / n_workers)
+    return gain > SECONDES_DEMARRAGE_POOL
+
+
+def _extract_page_range(pdf_bytes, start, stop):
+    """
+    Extrait le texte des pages [start, stop) d'un PDF.
+
+    PDFium n'est pas thread-safe : chaque processus de travail ouvre donc sa
+    propre copie du document.
+
+    Args:
+        pdf_bytes (bytes): Le contenu binaire du fichier PDF.
+        start (int): Index de la première page à extraire.
+        stop (int): Index de fin (exclu).
+
+    Returns:
+        list[str]: Le texte de chaque page, dans l'ordre du document.
+    """
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        texts = []
+        for index in range(start, stop):
+            page = pdf[index]
+            try:
+                textpage = page.get_textpage()
+                try:
+                    # PDFium restitue directement le texte ligne par ligne
+                    # (séparées par "\r\n") : le parseur n'a plus qu'à appeler
+                    # splitlines(), il n'y a pas de regroupement des caractères
+                    # en lignes à refaire.
+                    texts.append(textpage.get_text_bounded())
+                finally:
+                    textpage.close()
+            finally:
+                page.close()
+        return texts
+    finally:
+        pdf.close()
+
+
+def extract_page_texts(pdf_bytes):
+    """
+    Extrait le texte de toutes les pages d'un PDF, en parallèle si le
+    document est assez long pour amortir le démarrage des processus.
+
+    Les pages sont réparties en blocs contigus, un par processus, puis les
+    textes sont réassemblés dans l'ordre du document.
+
+    PDFium restitue une ligne par "\r\n", dans l'ordre du flux de contenu,
+    sans l'analyse de mise en page (LAParams) de pdfminer ni tri selon la
+    position sur la page : un relevé écrit de haut en bas est lu de haut en
+    bas (voir tests/test_pdf_extraction.py). Les espaces multiples d'une
+    ligne sont réduits à un seul, ce que les motifs du parseur tolèrent.
+
+    Args:
+        pdf_bytes (bytes): Le contenu binaire du fichier PDF.
+
+    Returns:
+        list[str]: Le texte de chaque page, dans l'ordre du document.
+    """
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        n_pages = len(pdf)
+    finally:
+        pdf.close()
+
+    n_workers = _available_cpus()
+    if not _parallel_is_worth_it(n_pages, n_workers):
+        return _extract_page_range(pdf_bytes, 0, n_pages)
+
+    chunk_size = -(-n_pages // n_workers)
+    ranges = [(start, min(start + chunk_size, n_pages)) for start in range(0, n_pages, chunk_size)]
+
+    # "spawn" plutôt que "fork" (défaut sous Linux) : forker le serveur
+    # Streamlit, multi-thread, peut bloquer les processus enfants.
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(ranges), mp_context=mp_context) as executor:
+        futures = [executor.submit(_extract_page_range, pdf_bytes, start, stop) for start, stop in ranges]
+        return [text for future in futures for text in future.result()]
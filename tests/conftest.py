@@ -0,0 +1,39 @@
+import ctypes
+import io
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+import pytest
+
+
+def build_pdf(pages_lines, font_size=10, line_height=14, reverse_stream=False):
+    """
+    Construit un PDF dont chaque page contient les lignes données, de haut en
+    bas, une ligne par objet texte.
+
+    Avec reverse_stream, les objets sont écrits dans le flux de contenu de la
+    dernière ligne à la première, sans changer leur position sur la page.
+    """
+    pdf = pdfium.PdfDocument.new()
+    for lines in pages_lines:
+        page = pdf.new_page(595, 842)
+        placed = list(enumerate(lines))
+        if reverse_stream:
+            placed.reverse()
+        for index, text in placed:
+            text_obj = pdfium_c.FPDFPageObj_NewTextObj(pdf.raw, b"Helvetica", font_size)
+            buffer = ctypes.create_string_buffer((text + "\x00").encode("utf-16-le"))
+            pdfium_c.FPDFText_SetText(text_obj, ctypes.cast(buffer, ctypes.POINTER(pdfium_c.FPDF_WCHAR)))
+            pdfium_c.FPDFPageObj_Transform(text_obj, 1, 0, 0, 1, 40, 800 - index * line_height)
+            pdfium_c.FPDFPage_InsertObject(page.raw, text_obj)
+        pdfium_c.FPDFPage_GenerateContent(page.raw)
+        page.close()
+    output = io.BytesIO()
+    pdf.save(output)
+    pdf.close()
+    return output.getvalue()
+
+
+@pytest.fixture
+def make_pdf():
+    return build_pdf
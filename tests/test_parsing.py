@@ -0,0 +1,113 @@
+"""
+Vérifie que parse_pdf donne les mêmes résultats que le parseur PDF
+d'origine (cascade de re.search ligne par ligne) sur des pages d'exemple.
+"""
+
+import re
+
+import pytest
+
+from app import parse_pdf
+
+
+def parse_lines_reference(page_texts, sections_filtre, plans_filtre):
+    """Boucle de parsing d'origine, appliquée au texte déjà extrait des pages."""
+    data = []
+    current_section = None
+    current_plan = None
+    current_proprietaire = []
+    current_adresse = ""
+    is_in_relevant_parcel = False
+
+    for text in page_texts:
+        if not text:
+            continue
+        for line in text.splitlines():
+            header_match = re.search(r"Section\s*:\s*(\w+)\s*Plan\s*:\s*(\d+)", line, re.IGNORECASE)
+            if header_match:
+                current_section = header_match.group(1).strip().upper()
+                current_plan = header_match.group(2).strip()
+                is_in_relevant_parcel = (current_section in sections_filtre and current_plan in plans_filtre)
+                current_proprietaire = []
+                current_adresse = ""
+                continue
+
+            if is_in_relevant_parcel:
+                lot_match = re.search(r"Lot\s+(\d+)", line, re.IGNORECASE)
+                tantiemes_match = re.search(r"(\d+\s*/\s*\d+)", line)
+
+                if lot_match and tantiemes_match:
+                    if current_proprietaire:
+                        data.append({
+                            "Section": current_section,
+                            "Plan": current_plan,
+                            "N° Lot": lot_match.group(1),
+                            "Tantièmes": tantiemes_match.group(1).replace(" ", ""),
+                            "Propriétaires": "\n".join(current_proprietaire),
+                            "Adresse Postale Propriétaire": current_adresse.strip()
+                        })
+                elif re.match(r"^[A-Z\s/.'-]{5,}$", line.strip()) and not lot_match and not tantiemes_match and "LOT" not in line.upper():
+                    if current_adresse:
+                        current_proprietaire = []
+                        current_adresse = ""
+                    current_proprietaire.append(line.strip())
+                elif current_proprietaire and not current_adresse:
+                    if re.search(r"\d", line) and re.search(r"[a-zA-Z]", line):
+                        current_adresse += line.strip() + "\n"
+
+    return data
+
+
+PAGES = [
+    "Relevé de propriété\r\n"
+    "Section : AC  Plan : 124\r\n"
+    "DUPONT JEAN\r\n"
+    "12 rue de la Paix 75001 PARIS\r\n"
+    "Lot 1    123 / 10000\r\n"
+    "Lot 123/10000\r\n"
+    "123/10000 Lot 12\r\n"
+    "Acquis le 01/02/2003 Lot 4 100/1000\r\n"
+    "lot 7 5 / 100\r\n"
+    "Lot 8\r\n",
+    # La parcelle se poursuit sur la page suivante, sans nouvel en-tête.
+    "  Lot 9   40/10000  \r\n"
+    "\r\n"
+    "M. DE LA ROCHE-O'NEIL\r\n"
+    "Lot 10 sans adresse 1/2\r\n"
+    "LOTISSEMENT DES PINS\r\n"
+    "3 AV FOCH 75016 PARIS\r\n"
+    "Lot 11 7/100\r\n"
+    "MARTIN\xa0PAUL\r\n"
+    "BP 12 Cedex\r\n"
+    "Lot 13 2/3\r\n",
+    "Section : BD Plan : 1\r\n"
+    "DURAND PIERRE\r\n"
+    "1 place X 69000 LYON\r\n"
+    "Lot 20 1/2\r\n"
+    "Section : ac Plan : 124 Lot 99 1/2\r\n"
+    "LEROY ANNE\r\n"
+    "Lot 21 3/4\r\n",
+    "",
+    "Section : AC Plan : 125\r\n"
+    "PETIT LUC\r\n"
+    "Lot 30 1/10\r\n",
+]
+
+
+@pytest.mark.parametrize("sections, plans", [
+    (["AC"], ["124"]),
+    (["AC", "BD"], ["124", "1"]),
+    (["AC"], ["125"]),
+    (["ZZ"], ["1"]),
+])
+def test_parse_pdf_matches_reference(sections, plans):
+    parcelles_filtre = frozenset((s, p) for s in sections for p in plans)
+    expected = parse_lines_reference(PAGES, sections, plans)
+    assert parse_pdf(PAGES, parcelles_filtre).to_dict("records") == expected
+
+
+def test_lot_number_is_not_split_by_fraction():
+    rows = parse_pdf(PAGES, frozenset({("AC", "124")})).to_dict("records")
+    lots = {row["N° Lot"]: row["Tantièmes"] for row in rows}
+    assert lots["123"] == "123/10000"
+    assert lots["12"] == "123/10000"
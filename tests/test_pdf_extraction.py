@@ -0,0 +1,44 @@
+import pdf_extraction
+from pdf_extraction import _extract_page_range, _parallel_is_worth_it, extract_page_texts
+
+
+def test_parallel_extraction_matches_serial(make_pdf, monkeypatch):
+    pages = [[f"Lot {page}-{line} 123 / 10000" for line in range(5)] for page in range(7)]
+    data = make_pdf(pages)
+
+    # Force le passage par le pool de processus, même sur une machine à 1 CPU.
+    monkeypatch.setattr(pdf_extraction, "_available_cpus", lambda: 3)
+    monkeypatch.setattr(pdf_extraction, "SECONDES_DEMARRAGE_POOL", 0)
+
+    assert extract_page_texts(data) == _extract_page_range(data, 0, len(pages))
+
+
+def test_parallel_only_for_long_documents():
+    assert not _parallel_is_worth_it(100, 8)
+    assert not _parallel_is_worth_it(10_000, 1)
+    assert _parallel_is_worth_it(5_000, 2)
+
+
+SAMPLE_LINES = [
+    "Section : AC Plan : 124",
+    "DUPONT JEAN",
+    "12 rue de la Paix 75001 PARIS",
+    "Lot 1 123 / 10000",
+    "Lot 2 50 / 10000",
+]
+
+
+def test_lines_are_returned_top_to_bottom(make_pdf):
+    data = make_pdf([SAMPLE_LINES, SAMPLE_LINES[:2]])
+
+    texts = extract_page_texts(data)
+
+    assert [text.split("\r\n") for text in texts] == [SAMPLE_LINES, SAMPLE_LINES[:2]]
+
+
+def test_lines_follow_content_stream_order(make_pdf):
+    # PDFium ne retrie pas les lignes selon leur position : un flux écrit de
+    # bas en haut est restitué de bas en haut.
+    data = make_pdf([SAMPLE_LINES], reverse_stream=True)
+
+    assert extract_page_texts(data)[0].split("\r\n") == SAMPLE_LINES[::-1]